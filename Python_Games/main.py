@@ -9,6 +9,13 @@ import pygame
 import time
 import random
 import json  # For saving and loading top scores
+import struct  # For the save-state format
+import sys
+import threading  # For the pipelined simulation/render loop
+import queue
+from array import array
+from collections import namedtuple
+import spectator  # Optional state stream for local spectators
 
 print(f"Current working directory: {os.getcwd()}")
 pygame.font.init()
@@ -31,6 +38,19 @@ LASER_HEIGHT = 75  # Increased from 50
 LASER_VEL = 7
 LASER_COOLDOWN = 500  # milliseconds between shots
 
+# Pipelined mode runs the simulation on a worker thread while the main thread renders
+PIPELINED = os.environ.get("SPACE_DODGE_PIPELINED") == "1"
+EXPLOSION_TICKS = 6  # How many simulation ticks an alien explosion stays visible
+
+# Stream game state to spectators on this address, e.g. "7777" or "unix:/tmp/space-dodge.sock"
+SPECTATE = os.environ.get("SPACE_DODGE_SPECTATE")
+PUBLISHER = None
+if SPECTATE:
+    try:
+        PUBLISHER = spectator.Publisher(SPECTATE)
+    except (OSError, ValueError) as e:  # Address in use, unbindable socket path or a bad port
+        print(f"Error: Could not start the spectator stream on '{SPECTATE}' ({e}). Playing without it.")
+
 def load_image(path, fallback_color=(255, 0, 0)):
     """Load an image and return a fallback surface if the file is missing."""
     try:
@@ -45,8 +65,6 @@ def load_image(path, fallback_color=(255, 0, 0)):
 BG = pygame.transform.scale(load_image("images/Spacebg.jpg"), (WIDTH, HEIGHT))  # Use spacebg.jpg as the background
 SH = load_image("images/spacecraft.png") # Ship with transparency
 MS = load_image("images/asteroid.png")  # Asteroid with transparency
-BG_LAYER_1 = pygame.transform.scale(load_image("images/Spacebg.jpg"), (WIDTH, HEIGHT))  # Parallax layer 1
-BG_LAYER_2 = pygame.transform.scale(load_image("images/Spacebg.jpg"), (WIDTH, HEIGHT))  # Parallax layer 2
 # Load alien image
 ALIEN_IMG = pygame.transform.scale(load_image("images/Aliens.png", fallback_color=(255, 0, 0)), (STAR_WIDTH, STAR_HEIGHT))  # Same size as asteroids
 
@@ -58,8 +76,24 @@ LASER_SOUND = "Sounds/Laser Gun.mp3"
 EXPLOSION_IMG = pygame.transform.scale(load_image("images/vecteezy_explosion-with-pixel-art-vector-illustration_8202202.png"), (100, 100))
 EXPLOSION_SOUND = "Sounds/Big Explosion Cut Off.mp3"
 
+# Asteroid scaled once for the pipelined renderer instead of every frame
+STAR_IMG = pygame.transform.scale(MS, (STAR_WIDTH, STAR_HEIGHT))
+
 TOP_SCORES_FILE = "top_scores.json"
 
+# Save states: a versioned binary blob holding everything Simulation needs to continue a round
+SUSPEND_FILE = "suspend.bin"  # Written when quitting mid-round, deleted once resumed
+CHECKPOINT_FILE = "checkpoint.bin"  # Written by F5, read by F9 when no checkpoint was made this session
+SAVE_MAGIC = b"SDSV"
+SAVE_VERSION = 2
+SAVE_HEADER = struct.Struct("<4sH")  # Magic, version
+# Tick, score, base score, level, star velocity, elapsed time, time since last alien, star count,
+# star interval, ms since last shot, player x/y, level 5 message shown, forward movement enabled,
+# whether the round was ever continued from a checkpoint
+SAVE_STATE = struct.Struct("<IiiHdddiiqhh???")
+SAVE_RNG = struct.Struct("<625I?d")  # Mersenne Twister state, whether gauss_next is set, gauss_next
+SAVE_COUNT = struct.Struct("<H")  # Number of int16 values in the entity list that follows
+
 def load_top_scores():
     try:
         with open(TOP_SCORES_FILE, "r") as file:
@@ -71,6 +105,79 @@ def save_top_scores(top_scores):
     with open(TOP_SCORES_FILE, "w") as file:
         json.dump(top_scores, file)
 
+def check_saved_game(blob):
+    """Raise ValueError unless blob is a complete save state of the current version."""
+    if blob[:SAVE_HEADER.size] != SAVE_HEADER.pack(SAVE_MAGIC, SAVE_VERSION):
+        raise ValueError(f"Not a version {SAVE_VERSION} Space Dodge save")
+    pos = SAVE_HEADER.size + SAVE_STATE.size
+    if len(blob) < pos + SAVE_RNG.size or SAVE_RNG.unpack_from(blob, pos)[624] > 624:
+        raise ValueError("Save state is truncated or has an invalid RNG state")
+    pos += SAVE_RNG.size
+    for _ in range(4):  # Stars, aliens, lasers, explosions
+        if len(blob) < pos + SAVE_COUNT.size:
+            raise ValueError("Save state is truncated")
+        (count,) = SAVE_COUNT.unpack_from(blob, pos)
+        pos += SAVE_COUNT.size + 2 * count
+    if pos != len(blob):
+        raise ValueError("Save state has the wrong length")
+
+def load_saved_game(path):
+    """Return the save state stored in path, or None if there is no usable one."""
+    try:
+        with open(path, "rb") as file:
+            blob = file.read()
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        print(f"Error: Could not read '{path}' ({e}). Ignoring it.")
+        return None
+    try:
+        check_saved_game(blob)
+    except (ValueError, struct.error) as e:
+        print(f"Error: '{path}' is not a usable save ({e}). Ignoring it.")
+        return None
+    return blob
+
+def write_saved_game(path, blob):
+    # Write a temporary file first so a crash mid-write never leaves a truncated save behind
+    try:
+        with open(path + ".tmp", "wb") as file:
+            file.write(blob)
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        print(f"Error: Could not write '{path}' ({e}). The save was not stored on disk.")
+
+def take_suspended_game():
+    """Load the suspended round and delete it, so a suspended round can only be resumed once."""
+    blob = load_saved_game(SUSPEND_FILE)
+    try:
+        os.remove(SUSPEND_FILE)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        # Resuming a save that stays on disk would let the same round be replayed
+        print(f"Error: Could not remove '{SUSPEND_FILE}' ({e}). Not resuming it.")
+        return None
+    return blob
+
+def pack_shorts(blob, values):
+    """Append a count and that many little-endian int16 values to blob."""
+    packed = array("h", values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    blob += SAVE_COUNT.pack(len(packed))
+    blob += packed.tobytes()
+
+def unpack_shorts(blob, pos):
+    """Read values written by pack_shorts. Returns them and the next position."""
+    (count,) = SAVE_COUNT.unpack_from(blob, pos)
+    pos += SAVE_COUNT.size
+    packed = array("h")
+    packed.frombytes(blob[pos:pos + 2 * count])
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed, pos + 2 * count
+
 def get_player_name():
     """Custom function to get the player's name using pygame."""
     name = ""
@@ -107,42 +214,6 @@ def update_top_scores(score):  # Changed parameter from elapsed_time to score
         for score in top_scores:
             print(f"{score['name']}: {score['score']} points")  # Changed display text
 
-def draw_background(scroll_y1, scroll_y2):
-    # Parallax scrolling effect
-    WIN.blit(BG_LAYER_1, (0, scroll_y1 % HEIGHT))
-    WIN.blit(BG_LAYER_1, (0, (scroll_y1 % HEIGHT) - HEIGHT))
-    WIN.blit(BG_LAYER_2, (0, scroll_y2 % HEIGHT))
-    WIN.blit(BG_LAYER_2, (0, (scroll_y2 % HEIGHT) - HEIGHT))
-
-def draw(player, elapsed_time, stars, aliens, LEVEL, score):
-    WIN.blit(BG, (0, 0))
-
-    # Score text (simplified, just show total score)
-    score_text = FONT.render(f"Score: {score}", 1, ("White"))
-    WIN.blit(score_text, (10, 10))
-
-    # Time text (below score)
-    time_text = FONT.render(f"Time: {round(elapsed_time)}s", 1, ("White"))
-    WIN.blit(time_text, (10, 40))
-
-    # Level text (top right)
-    level_text = FONT.render(f"Level: {LEVEL}", 1, ("White"))
-    WIN.blit(level_text, (WIDTH - level_text.get_width() - 10, 10))
-
-    # Draw the player and its lasers
-    player.draw(WIN)  # This will draw both the player and lasers
-
-    # Draw asteroids
-    for star in stars:
-        scaled_star = pygame.transform.scale(MS, (STAR_WIDTH, STAR_HEIGHT))
-        WIN.blit(scaled_star, (star.x, star.y))
-
-    # Draw aliens
-    for alien in aliens:
-        WIN.blit(ALIEN_IMG, (alien.x, alien.y))
-
-    pygame.display.update()
-
 class Background:
     def __init__(self, image_path):
         self.image = pygame.transform.scale(pygame.image.load(image_path), (WIDTH, HEIGHT))
@@ -368,188 +439,521 @@ class Game:
             self.update()  # Update game state
             self.draw()    # Draw everything
 
-def main():
-    global LEVEL, STAR_VEL, BG
-
-    # Reset game variables
-    LEVEL = 1  
-    STAR_VEL = 3
-
-    pygame.mixer.music.load("Sounds/Sun Machine One - Loopop.mp3")
-    pygame.mixer.music.play(-1)
-
-    run = True
-    # Create a Player instance instead of a Rect
-    player = Player(200, HEIGHT - PLAYER_HEIGHT, PLAYER_WIDTH, PLAYER_HEIGHT, "images/spacecraft.png")
-
-    clock = pygame.time.Clock()
-    start_time = time.time()
-    elapsed_time = 0
-    score = 0
-    base_score = 0  # Track time-based score separately
-
-    star_add_increment = 2000
-    star_count = 0
-    stars = []
-    aliens = []  # List to store aliens
-    alien_spawn_time = 0  # Track time for alien spawning
-    hit = False
-
-    scroll_y1 = 0
-    scroll_y2 = 0
-
-    level_5_message_shown = False  # Track if the level 5 message has been displayed
-
-    while run:
-        scroll_y1 += 1  # Slow scroll for layer 1
-        scroll_y2 += 2  # Faster scroll for layer 2
-
-        star_count += clock.tick(60)
-        elapsed_time = time.time() - start_time
+class FrameStats:
+    """Collects tick and frame timings so the single-threaded and pipelined loops can be compared."""
+    # Both loops use the same boundaries: simulation time covers step() and snapshot(),
+    # render time covers draw_snapshot() including the display update
+    def __init__(self, label):
+        self.label = label
+        self.started = time.perf_counter()
+        self.ticks = 0
+        self.sim_time = 0.0
+        self.frames = 0
+        self.render_time = 0.0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def record_tick(self, seconds):
+        self.ticks += 1
+        self.sim_time += seconds
+
+    def record_frame(self, input_time, render_seconds):
+        # Latency is measured from sampling the keyboard to the frame that shows its effect
+        latency = time.perf_counter() - input_time
+        self.frames += 1
+        self.render_time += render_seconds
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+
+    def report(self):
+        wall = time.perf_counter() - self.started
+        if not self.ticks or not self.frames:
+            return
+        print(f"[{self.label}] {self.ticks / wall:.1f} ticks/s, {self.frames / wall:.1f} frames/s, "
+              f"sim {1000 * self.sim_time / self.ticks:.2f} ms/tick, "
+              f"render {1000 * self.render_time / self.frames:.2f} ms/frame, "
+              f"input latency avg {1000 * self.latency_total / self.frames:.2f} ms "
+              f"/ max {1000 * self.latency_max:.2f} ms")
+
+# Immutable view of one simulation tick. Entity positions are packed int16 x/y pairs.
+Snapshot = namedtuple("Snapshot", [
+    "tick", "input_time", "elapsed_time", "score", "level", "player_x", "player_y",
+    "hit", "banner", "stars", "aliens", "lasers", "explosions",
+])
+
+def pack_positions(points):
+    """Pack (x, y) pairs into bytes of int16 values."""
+    packed = array("h")
+    for x, y in points:
+        packed.append(int(x))
+        packed.append(int(y))
+    return packed.tobytes()
+
+def unpack_positions(data):
+    """Turn bytes from pack_positions back into (x, y) pairs."""
+    packed = array("h")
+    packed.frombytes(data)
+    return zip(packed[::2], packed[1::2])
+
+class SnapshotBuffer:
+    """Triple buffer handing the newest snapshot from the simulation thread to the renderer."""
+    def __init__(self):
+        self.slots = [None, None, None]
+        self.back, self.middle, self.front = 0, 1, 2
+        self.fresh = False
+        self.condition = threading.Condition()
+
+    def publish(self, snapshot):
+        # Only the simulation thread touches the back slot, so it is filled outside the lock
+        self.slots[self.back] = snapshot
+        with self.condition:
+            self.back, self.middle = self.middle, self.back
+            self.fresh = True
+            self.condition.notify()
+
+    def latest(self, timeout=None):
+        """Return the newest snapshot, waiting up to timeout seconds for a new one."""
+        with self.condition:
+            if not self.fresh:
+                self.condition.wait(timeout)
+            if self.fresh:
+                self.front, self.middle = self.middle, self.front
+                self.fresh = False
+        return self.slots[self.front]
+
+class Simulation:
+    """Gameplay state and update logic for a round, shared by main() and main_pipelined()."""
+    def __init__(self, player):
+        self.player = player
+        self.input = (pygame.key.get_pressed(), time.perf_counter())  # Written by the main thread
+        self.commands = queue.SimpleQueue()  # "restart", "save" or "load", queued by the main thread
+        self.checkpoint = None
+        self.used_checkpoint = False  # Rounds continued from a checkpoint don't count for top scores
+        self.rng = random.Random()
+        self.tick = 0
+        self.start_time = time.time()
+        self.elapsed_time = 0
+        self.score = 0
+        self.base_score = 0  # Track time-based score separately
+        self.star_add_increment = 2000
+        self.star_count = 0
+        self.stars = []
+        self.aliens = []
+        self.explosions = []  # [x, y, ticks_left] for aliens shot down
+        self.alien_spawn_time = 0
+        self.hit = False
+        self.banner = None  # Message shown while the simulation pauses
+        self.error = None  # Set by run_simulation when the worker thread fails
+        self.level_5_message_shown = False
+        self.initial = self.save()  # Restarting restores this instead of rebuilding the round
+
+    def save(self):
+        """Capture the round as a versioned binary blob. Timers are stored relative to now."""
+        now = time.time()
+        _, internal, gauss_next = self.rng.getstate()
+        blob = bytearray(SAVE_HEADER.pack(SAVE_MAGIC, SAVE_VERSION))
+        blob += SAVE_STATE.pack(
+            self.tick, self.score, self.base_score, LEVEL, STAR_VEL,
+            now - self.start_time, now - self.alien_spawn_time,
+            self.star_count, self.star_add_increment,
+            pygame.time.get_ticks() - self.player.last_shot,
+            self.player.rect.x, self.player.rect.y,
+            self.level_5_message_shown, self.player.forward_movement_enabled, self.used_checkpoint,
+        )
+        blob += SAVE_RNG.pack(*internal, gauss_next is not None, gauss_next or 0.0)
+        pack_shorts(blob, [value for star in self.stars for value in (star.x, star.y)])
+        pack_shorts(blob, [value for alien in self.aliens for value in (alien.x, alien.y)])
+        pack_shorts(blob, [value for laser in self.player.lasers for value in (laser.rect.x, laser.rect.y)])
+        pack_shorts(blob, [value for explosion in self.explosions for value in explosion])
+        return bytes(blob)
+
+    def restore(self, blob):
+        """Continue from a blob made by save(). Reuses the loaded player and images."""
+        global LEVEL, STAR_VEL
+        check_saved_game(blob)
+        pos = SAVE_HEADER.size
+        (self.tick, self.score, self.base_score, LEVEL, STAR_VEL, elapsed_time, alien_spawn_age,
+         self.star_count, self.star_add_increment, last_shot_age, player_x, player_y,
+         self.level_5_message_shown, self.player.forward_movement_enabled,
+         self.used_checkpoint) = SAVE_STATE.unpack_from(blob, pos)
+        pos += SAVE_STATE.size
+        rng = SAVE_RNG.unpack_from(blob, pos)
+        pos += SAVE_RNG.size
+        self.rng.setstate((self.rng.getstate()[0], rng[:625], rng[626] if rng[625] else None))
+
+        now = time.time()
+        self.elapsed_time = elapsed_time
+        self.start_time = now - elapsed_time
+        self.alien_spawn_time = now - alien_spawn_age
+        self.player.last_shot = pygame.time.get_ticks() - last_shot_age
+        self.player.rect.topleft = (player_x, player_y)
+
+        stars, pos = unpack_shorts(blob, pos)
+        aliens, pos = unpack_shorts(blob, pos)
+        lasers, pos = unpack_shorts(blob, pos)
+        explosions, pos = unpack_shorts(blob, pos)
+        self.stars = [pygame.Rect(x, y, STAR_WIDTH, STAR_HEIGHT) for x, y in zip(stars[::2], stars[1::2])]
+        self.aliens = [pygame.Rect(x, y, STAR_WIDTH, STAR_HEIGHT) for x, y in zip(aliens[::2], aliens[1::2])]
+        self.player.lasers = [Laser(x, y) for x, y in zip(lasers[::2], lasers[1::2])]
+        self.explosions = [list(explosion) for explosion in zip(explosions[::3], explosions[1::3], explosions[2::3])]
+        self.hit = False
+        self.banner = None
+
+    def restart(self):
+        """Go back to the start of the round without reloading anything, with fresh randomness."""
+        self.restore(self.initial)
+        self.rng.seed()
+        while not self.commands.empty():
+            self.commands.get()  # Keys pressed during the last round don't carry over
+
+    def handle_commands(self):
+        # Runs on the simulating thread so saves and restores never see a half-finished tick
+        while not self.commands.empty():
+            command = self.commands.get()
+            if command == "restart":
+                self.restart()
+            elif command == "save":
+                self.checkpoint = self.save()
+                write_saved_game(CHECKPOINT_FILE, self.checkpoint)
+            elif command == "load":
+                checkpoint = self.checkpoint or load_saved_game(CHECKPOINT_FILE)
+                if checkpoint:
+                    self.restore(checkpoint)
+                    self.used_checkpoint = True
+
+    def step(self, dt, keys):
+        global LEVEL, STAR_VEL
+        self.handle_commands()
+        self.tick += 1
+        self.star_count += dt
+        self.elapsed_time = time.time() - self.start_time
 
         # Update base score every 10 seconds
-        time_points = int(elapsed_time) // 10  # 1 point for every 10 seconds
-        if time_points > base_score:  # Only update when a new 10-second interval is reached
-            score += (time_points - base_score)  # Add only the new points
-            base_score = time_points  # Update the base score
+        time_points = int(self.elapsed_time) // 10
+        if time_points > self.base_score:
+            self.score += time_points - self.base_score
+            self.base_score = time_points
 
         # Spawn stars
-        if star_count >= star_add_increment:
+        if self.star_count >= self.star_add_increment:
             for _ in range(3):
-                star_x = random.randint(0, WIDTH - STAR_WIDTH)
-                star = pygame.Rect(star_x, -STAR_HEIGHT, STAR_WIDTH, STAR_HEIGHT)
-                stars.append(star)
-            star_add_increment = max(200, star_add_increment - 50)
-            star_count = 0
+                star_x = self.rng.randint(0, WIDTH - STAR_WIDTH)
+                self.stars.append(pygame.Rect(star_x, -STAR_HEIGHT, STAR_WIDTH, STAR_HEIGHT))
+            self.star_add_increment = max(200, self.star_add_increment - 50)
+            self.star_count = 0
 
         # Spawn aliens starting at level 10
-        if LEVEL >= 10 and time.time() - alien_spawn_time >= 3:  # Spawn every 3 seconds
-            alien_x = random.randint(0, WIDTH - STAR_WIDTH)
-            alien = pygame.Rect(alien_x, -STAR_HEIGHT, STAR_WIDTH, STAR_HEIGHT)
-            aliens.append(alien)
-            alien_spawn_time = time.time()
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                run = False
-                break
-
-        keys = pygame.key.get_pressed()
-        player.move(keys)  # Use the Player's move method
+        if LEVEL >= 10 and time.time() - self.alien_spawn_time >= 3:
+            alien_x = self.rng.randint(0, WIDTH - STAR_WIDTH)
+            self.aliens.append(pygame.Rect(alien_x, -STAR_HEIGHT, STAR_WIDTH, STAR_HEIGHT))
+            self.alien_spawn_time = time.time()
 
-        # Handle shooting
+        self.player.move(keys)
         if LEVEL >= 10 and keys[pygame.K_SPACE]:
-            player.shoot()
+            self.player.shoot()
+        self.player.update_lasers()
 
-        # Update lasers
-        player.update_lasers()
+        for explosion in self.explosions[:]:
+            explosion[2] -= 1
+            if explosion[2] <= 0:
+                self.explosions.remove(explosion)
 
         # Check laser collisions with aliens
-        for laser in player.lasers[:]:
-            for alien in aliens[:]:
+        for laser in self.player.lasers[:]:
+            for alien in self.aliens[:]:
                 if laser.rect.colliderect(alien):
-                    # Calculate explosion position at the alien's location
-                    explosion_x = alien.x + STAR_WIDTH // 2 - EXPLOSION_IMG.get_width() // 2
-                    explosion_y = alien.y + STAR_HEIGHT // 2 - EXPLOSION_IMG.get_height() // 2
-                    
-                    # Remove alien and laser
-                    aliens.remove(alien)
-                    player.lasers.remove(laser)
-                    score += 1
-                    
-                    # Show explosion effect
-                    WIN.blit(EXPLOSION_IMG, (explosion_x, explosion_y))
-                    pygame.display.update()
-                    
-                    # Play explosion sound
+                    self.explosions.append([
+                        alien.x + STAR_WIDTH // 2 - EXPLOSION_IMG.get_width() // 2,
+                        alien.y + STAR_HEIGHT // 2 - EXPLOSION_IMG.get_height() // 2,
+                        EXPLOSION_TICKS,
+                    ])
+                    self.aliens.remove(alien)
+                    self.player.lasers.remove(laser)
+                    self.score += 1
                     try:
                         explosion_sound = pygame.mixer.Sound(EXPLOSION_SOUND)
                         explosion_sound.set_volume(0.3)
                         explosion_sound.play()
                     except:
                         print("Could not play explosion sound")
-                        
-                    # Small delay to make explosion visible
-                    pygame.time.delay(50)  # 50ms delay, adjust if needed
                     break
 
-        draw_background(scroll_y1, scroll_y2)
-        draw(player, elapsed_time, stars, aliens, LEVEL, score)  # Pass the updated score
-
         # Update stars
-        for star in stars[:]:
+        for star in self.stars[:]:
             star.y += STAR_VEL
             if star.y > HEIGHT:
-                stars.remove(star)
-            elif star.y + star.height >= player.rect.y and star.colliderect(player.rect):
-                stars.remove(star)
-                hit = True
+                self.stars.remove(star)
+            elif star.y + star.height >= self.player.rect.y and star.colliderect(self.player.rect):
+                self.stars.remove(star)
+                self.hit = True
                 break
 
         # Update aliens
-        for alien in aliens[:]:
-            alien.y += STAR_VEL  # Aliens move at the same speed as stars
+        for alien in self.aliens[:]:
+            alien.y += STAR_VEL
             if alien.y > HEIGHT:
-                aliens.remove(alien)
-            elif alien.colliderect(player.rect):
-                aliens.remove(alien)
-                hit = True
+                self.aliens.remove(alien)
+            elif alien.colliderect(self.player.rect):
+                self.aliens.remove(alien)
+                self.hit = True
                 break
 
-        # Draw aliens
-        for alien in aliens:
-            WIN.blit(ALIEN_IMG, (alien.x, alien.y))
-
-        if hit:
-            # Play explosion sound
-            pygame.mixer.Sound(EXPLOSION_SOUND).play()
-
-            # Display explosion image
-            WIN.blit(EXPLOSION_IMG, (player.rect.x + PLAYER_WIDTH // 2 - EXPLOSION_IMG.get_width() // 2,
-                                     player.rect.y + PLAYER_HEIGHT // 2 - EXPLOSION_IMG.get_height() // 2))
-            pygame.display.update()
-            pygame.time.delay(1000)  # Show explosion for 1 second
-
-            lost_text = FONT.render("You lost!", 1, ("Red"))
-            WIN.blit(lost_text, (WIDTH // 2 - lost_text.get_width() // 2, HEIGHT // 2 - lost_text.get_height() // 2))
-            pygame.display.update()
-            pygame.time.delay(2000)
-
-            # Check if the score is a top score
-            update_top_scores(score)  # Update this line to pass score instead of elapsed_time
-
-            # Ask if the player wants to play again
-            play_again = ask_play_again()
-            if play_again:
-                main()  # Restart the game
-            else:
-                menu()  # Return to the main menu
-            return  # Exit the current game loop
-
-        if int(elapsed_time) // 10 + 1 > LEVEL:
+        if int(self.elapsed_time) // 10 + 1 > LEVEL:
             LEVEL += 1
             if LEVEL == 10:
-                # Show message about new shooting ability
-                shoot_text = FONT.render("Level 10! Press SPACE to shoot aliens!", 1, ("Yellow"))
-                WIN.blit(shoot_text, (WIDTH // 2 - shoot_text.get_width() // 2, HEIGHT // 2 - 100))
-                pygame.display.update()
-                pygame.time.delay(3000)  # Display for 3 seconds
+                self.banner = "Level 10! Press SPACE to shoot aliens!"
             if LEVEL < 5:
                 STAR_VEL += 1
             else:
                 STAR_VEL += 0.5
 
-        if LEVEL >= 5 and not level_5_message_shown:
-            # Show congratulatory message at level 5
-            congrats_text = FONT.render("Level 5! You can now move forward and backward!", 1, ("Yellow"))
-            WIN.blit(congrats_text, (WIDTH // 2 - congrats_text.get_width() // 2, HEIGHT // 2 - 100))
-            pygame.display.update()
+        if LEVEL >= 5 and not self.level_5_message_shown:
+            self.banner = "Level 5! You can now move forward and backward!"
+            self.level_5_message_shown = True
+            self.player.forward_movement_enabled = True
+
+    def snapshot(self, input_time):
+        return Snapshot(
+            tick=self.tick,
+            input_time=input_time,
+            elapsed_time=self.elapsed_time,
+            score=self.score,
+            level=LEVEL,
+            player_x=self.player.rect.x,
+            player_y=self.player.rect.y,
+            hit=self.hit,
+            banner=self.banner,
+            stars=pack_positions((star.x, star.y) for star in self.stars),
+            aliens=pack_positions((alien.x, alien.y) for alien in self.aliens),
+            lasers=pack_positions((laser.rect.x, laser.rect.y) for laser in self.player.lasers),
+            explosions=pack_positions((x, y) for x, y, _ in self.explosions),
+        )
+
+def publish_state(sim):
+    """Send this tick to spectators when SPACE_DODGE_SPECTATE is set."""
+    if PUBLISHER is None:
+        return
+    PUBLISHER.publish(spectator.State(
+        sim.tick, sim.score, LEVEL, STAR_VEL, (sim.player.rect.x, sim.player.rect.y),
+        tuple((star.x, star.y) for star in sim.stars),
+        tuple((alien.x, alien.y) for alien in sim.aliens),
+        tuple((laser.rect.x, laser.rect.y) for laser in sim.player.lasers),
+    ))
+
+def handle_save_keys(event, sim):
+    """R restarts the round instantly, F5 saves a checkpoint and F9 returns to it."""
+    commands = {pygame.K_r: "restart", pygame.K_F5: "save", pygame.K_F9: "load"}
+    if event.type == pygame.KEYDOWN and event.key in commands:
+        sim.commands.put(commands[event.key])
+
+def new_round_stats(label):
+    """Start timing a round, for both the game loop and the spectator stream."""
+    if PUBLISHER is not None:
+        PUBLISHER.reset()
+    return FrameStats(label)
+
+def report_round(stats):
+    stats.report()
+    if PUBLISHER is not None:
+        PUBLISHER.report()
+
+def run_simulation(sim, buffer, stop, stats):
+    """Worker thread body: tick the simulation at 60 Hz and publish a snapshot per tick."""
+    clock = pygame.time.Clock()
+    try:
+        while not stop.is_set():
+            dt = clock.tick(60)
+            keys, input_time = sim.input
+            started = time.perf_counter()
+            sim.step(dt, keys)
+            snapshot = sim.snapshot(input_time)
+            stats.record_tick(time.perf_counter() - started)
+            buffer.publish(snapshot)
+            publish_state(sim)
+            if sim.hit:
+                return
+            if sim.banner:
+                stop.wait(3)  # Pause for 3 seconds like the single-threaded loop, without blocking rendering
+                sim.banner = None
+    except Exception as e:
+        sim.error = e  # main_pipelined re-raises this on the main thread
+
+def draw_snapshot(snapshot, player_image):
+    WIN.blit(BG, (0, 0))
+
+    score_text = FONT.render(f"Score: {snapshot.score}", 1, ("White"))
+    WIN.blit(score_text, (10, 10))
+    time_text = FONT.render(f"Time: {round(snapshot.elapsed_time)}s", 1, ("White"))
+    WIN.blit(time_text, (10, 40))
+    level_text = FONT.render(f"Level: {snapshot.level}", 1, ("White"))
+    WIN.blit(level_text, (WIDTH - level_text.get_width() - 10, 10))
+
+    WIN.blit(player_image, (snapshot.player_x, snapshot.player_y))
+    for position in unpack_positions(snapshot.lasers):
+        WIN.blit(LASER_IMG, position)
+    for position in unpack_positions(snapshot.stars):
+        WIN.blit(STAR_IMG, position)
+    for position in unpack_positions(snapshot.aliens):
+        WIN.blit(ALIEN_IMG, position)
+    for position in unpack_positions(snapshot.explosions):
+        WIN.blit(EXPLOSION_IMG, position)
+
+    if snapshot.banner:
+        banner_text = FONT.render(snapshot.banner, 1, ("Yellow"))
+        WIN.blit(banner_text, (WIDTH // 2 - banner_text.get_width() // 2, HEIGHT // 2 - 100))
+
+    pygame.display.update()
+
+def main_pipelined(resume=None):
+    """Same game as main(), with simulation on a worker thread and rendering on this one."""
+    global LEVEL, STAR_VEL
+
+    # Reset game variables
+    LEVEL = 1
+    STAR_VEL = 3
+
+    pygame.mixer.music.load("Sounds/Sun Machine One - Loopop.mp3")
+    pygame.mixer.music.play(-1)
+
+    player = Player(200, HEIGHT - PLAYER_HEIGHT, PLAYER_WIDTH, PLAYER_HEIGHT, "images/spacecraft.png")
+    sim = Simulation(player)
+    if resume:
+        sim.restore(resume)
+    buffer = SnapshotBuffer()
+    stop = threading.Event()
+    worker = None
+    shown = None
+
+    while True:
+        if worker is None:
+            stats = new_round_stats("pipelined")
+            worker = threading.Thread(target=run_simulation, args=(sim, buffer, stop, stats), daemon=True)
+            worker.start()
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                stop.set()
+                worker.join()
+                if not sim.hit:  # A round that already ended must not be resumable
+                    write_saved_game(SUSPEND_FILE, sim.save())  # Suspend the round so it can be resumed later
+                report_round(stats)
+                pygame.quit()
+                return
+            handle_save_keys(event, sim)
+
+        sim.input = (pygame.key.get_pressed(), time.perf_counter())
+
+        snapshot = buffer.latest(timeout=1 / 60)
+        if not worker.is_alive() and sim.error is not None:
+            raise sim.error  # The simulation died, so no new snapshot will ever arrive
+        if snapshot is None or snapshot is shown:
+            continue  # Nothing new to show, keep pumping events
+        render_started = time.perf_counter()
+        draw_snapshot(snapshot, player.image)
+        stats.record_frame(snapshot.input_time, time.perf_counter() - render_started)
+        shown = snapshot
+
+        if snapshot.hit:
+            worker.join()
+            report_round(stats)
+            if not game_over(snapshot.player_x, snapshot.player_y, snapshot.score, not sim.used_checkpoint):
+                menu()  # Return to the main menu
+                return
+            sim.restart()  # Play again without rebuilding the player or reloading music
+            worker = None
+
+def main(resume=None):
+    global LEVEL, STAR_VEL
+
+    # Reset game variables
+    LEVEL = 1
+    STAR_VEL = 3
+
+    pygame.mixer.music.load("Sounds/Sun Machine One - Loopop.mp3")
+    pygame.mixer.music.play(-1)
+
+    # Create a Player instance instead of a Rect
+    player = Player(200, HEIGHT - PLAYER_HEIGHT, PLAYER_WIDTH, PLAYER_HEIGHT, "images/spacecraft.png")
+    sim = Simulation(player)
+    if resume:
+        sim.restore(resume)
+
+    clock = pygame.time.Clock()
+    stats = new_round_stats("single-threaded")
+
+    run = True
+    while run:
+        dt = clock.tick(60)
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                run = False
+                break
+            handle_save_keys(event, sim)
+
+        keys = pygame.key.get_pressed()
+        input_time = time.perf_counter()
+        sim_started = time.perf_counter()
+        sim.step(dt, keys)
+        snapshot = sim.snapshot(input_time)
+        stats.record_tick(time.perf_counter() - sim_started)
+
+        render_started = time.perf_counter()
+        draw_snapshot(snapshot, player.image)
+        stats.record_frame(input_time, time.perf_counter() - render_started)
+        publish_state(sim)
+
+        if sim.hit:
+            report_round(stats)
+            if not game_over(player.rect.x, player.rect.y, sim.score, not sim.used_checkpoint):
+                menu()  # Return to the main menu
+                return  # Exit the current game loop
+            sim.restart()  # Play again without rebuilding the player or reloading music
+            clock = pygame.time.Clock()  # Don't count the game over screens as the first tick's dt
+            stats = new_round_stats("single-threaded")
+
+        if sim.banner:
             pygame.time.delay(3000)  # Display for 3 seconds
-            level_5_message_shown = True
-            player.forward_movement_enabled = True  # Enable forward movement ability
+            sim.banner = None
 
+    if not sim.hit:  # A round that already ended must not be resumable
+        write_saved_game(SUSPEND_FILE, sim.save())  # Suspend the round so it can be resumed later
+    report_round(stats)
     pygame.quit()
 
+def play_game(resume=None):
+    """Start a round, or resume a saved one, with the loop selected by SPACE_DODGE_PIPELINED."""
+    if PIPELINED:
+        main_pipelined(resume)
+    else:
+        main(resume)
+
+def game_over(player_x, player_y, score, ranked=True):
+    """Show the explosion and loss screens, record a ranked score and ask whether to play again."""
+    # Play explosion sound
+    pygame.mixer.Sound(EXPLOSION_SOUND).play()
+
+    # Display explosion image
+    WIN.blit(EXPLOSION_IMG, (player_x + PLAYER_WIDTH // 2 - EXPLOSION_IMG.get_width() // 2,
+                             player_y + PLAYER_HEIGHT // 2 - EXPLOSION_IMG.get_height() // 2))
+    pygame.display.update()
+    pygame.time.delay(1000)  # Show explosion for 1 second
+
+    lost_text = FONT.render("You lost!", 1, ("Red"))
+    WIN.blit(lost_text, (WIDTH // 2 - lost_text.get_width() // 2, HEIGHT // 2 - lost_text.get_height() // 2))
+    if not ranked:
+        unranked_text = FONT.render("Continued from a checkpoint, so this score is not ranked.", 1, ("White"))
+        WIN.blit(unranked_text, (WIDTH // 2 - unranked_text.get_width() // 2, HEIGHT // 2 + 40))
+    pygame.display.update()
+    pygame.time.delay(2000)
+
+    # Check if the score is a top score
+    if ranked:
+        update_top_scores(score)
+
+    # Ask if the player wants to play again
+    return ask_play_again()
+
 def ask_play_again():
     """Ask the player if they want to play again or return to the main menu."""
     run = True
@@ -619,12 +1023,16 @@ def menu():
         scores_button = pygame.Rect(WIDTH // 2 - 100, 220, 200, 50)
         options_button = pygame.Rect(WIDTH // 2 - 100, 290, 200, 50)
         exit_button = pygame.Rect(WIDTH // 2 - 100, 360, 200, 50)
+        resume_button = pygame.Rect(WIDTH // 2 - 100, 430, 200, 50)
+        can_resume = os.path.exists(SUSPEND_FILE)
 
         # Draw buttons with shadows and rounded corners
         draw_button(WIN, play_button, (70, 130, 180), "Play", ("White"), button_font)  # Steel blue
         draw_button(WIN, scores_button, (34, 139, 34), "Top Scores", ("White"), button_font)  # Forest green
         draw_button(WIN, options_button, (255, 165, 0), "Options", ("White"), button_font)  # Orange
         draw_button(WIN, exit_button, (178, 34, 34), "Exit", ("White"), button_font)  # Firebrick red
+        if can_resume:
+            draw_button(WIN, resume_button, (106, 90, 205), "Resume", ("White"), button_font)  # Slate blue
 
         pygame.display.update()
 
@@ -638,7 +1046,7 @@ def menu():
                     mouse_pos = pygame.mouse.get_pos()
                     if play_button.collidepoint(mouse_pos):
                         pygame.mixer.music.stop()  # Stop the music when the play button is pressed
-                        main()  # Start the game
+                        play_game()  # Start the game
                     elif scores_button.collidepoint(mouse_pos):
                         display_top_scores()  # Show top scores
                     elif options_button.collidepoint(mouse_pos):
@@ -647,6 +1055,11 @@ def menu():
                         run = False
                         pygame.quit()
                         return
+                    elif can_resume and resume_button.collidepoint(mouse_pos):
+                        saved_game = take_suspended_game()
+                        if saved_game:
+                            pygame.mixer.music.stop()
+                            play_game(saved_game)  # Continue the suspended round
 
 def options_menu(volume):
     """Options menu for controlling volume."""
@@ -0,0 +1,243 @@
+# Spectator stream for Space Dodge.
+# A running game publishes one message per tick on a local TCP or Unix socket and viewer.py
+# renders any number of those streams at once. Enable it with SPACE_DODGE_SPECTATE=<address>,
+# where the address is "host:port", "port" or "unix:/path/to/socket".
+#
+# Messages are length prefixed. Every KEYFRAME_INTERVAL ticks a keyframe carries the full state;
+# the ticks in between are deltas against that keyframe, not against the previous tick, so a
+# spectator that falls behind can skip deltas and still decode the next one it receives.
+import os
+import socket
+import struct
+import time
+from collections import namedtuple
+
+KEYFRAME, DELTA = 0, 1
+KEYFRAME_INTERVAL = 60  # One keyframe per second at 60 ticks/s
+MAX_PENDING = 64 * 1024  # Bytes queued for a spectator before it starts skipping ticks
+
+HEADER = struct.Struct("<BI")  # Message kind, tick
+LENGTH = struct.Struct("<H")  # Frame length prefix on the socket
+STAR_VEL_FORMAT = struct.Struct("<f")
+
+# Positions are (x, y) tuples, entity lists are tuples of positions
+State = namedtuple("State", ["tick", "score", "level", "star_vel", "player", "stars", "aliens", "lasers"])
+EMPTY = State(0, 0, 0, 0.0, (0, 0), (), (), ())
+
+def _put(out, value):
+    """Append value as a zigzag varint, so small positive and negative numbers take one byte."""
+    value = value * 2 if value >= 0 else -value * 2 - 1
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _get(data, pos):
+    """Read a zigzag varint written by _put. Returns the value and the next position."""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            break
+        shift += 7
+    return (value >> 1 if value % 2 == 0 else -(value >> 1) - 1), pos
+
+def _dropped(points, reference):
+    """How many leading reference entities are gone, matched on x which never changes in flight."""
+    if not points:
+        return 0
+    for index, (x, _) in enumerate(reference):
+        if x == points[0][0]:
+            return index
+    return len(reference)
+
+def _put_points(out, points, reference):
+    dropped = _dropped(points, reference)
+    _put(out, dropped)
+    _put(out, len(points))
+    for index, (x, y) in enumerate(points):
+        ref_x, ref_y = reference[dropped + index] if dropped + index < len(reference) else (0, 0)
+        _put(out, x - ref_x)
+        _put(out, y - ref_y)
+
+def _get_points(data, pos, reference):
+    dropped, pos = _get(data, pos)
+    count, pos = _get(data, pos)
+    points = []
+    for index in range(count):
+        ref_x, ref_y = reference[dropped + index] if dropped + index < len(reference) else (0, 0)
+        dx, pos = _get(data, pos)
+        dy, pos = _get(data, pos)
+        points.append((ref_x + dx, ref_y + dy))
+    return tuple(points), pos
+
+def encode(state, keyframe=None):
+    """Encode state as a keyframe, or as a delta against keyframe when one is given."""
+    reference = keyframe or EMPTY
+    out = bytearray(HEADER.pack(DELTA if keyframe else KEYFRAME, state.tick))
+    _put(out, state.score - reference.score)
+    _put(out, state.level - reference.level)
+    out += STAR_VEL_FORMAT.pack(state.star_vel)
+    _put(out, state.player[0] - reference.player[0])
+    _put(out, state.player[1] - reference.player[1])
+    _put_points(out, state.stars, reference.stars)
+    _put_points(out, state.aliens, reference.aliens)
+    _put_points(out, state.lasers, reference.lasers)
+    return bytes(out)
+
+class Decoder:
+    """Turns messages from one stream back into State, remembering the last keyframe."""
+    def __init__(self):
+        self.keyframe = None
+
+    def decode(self, message):
+        """Return the decoded State, or None for a delta that arrived before any keyframe."""
+        kind, tick = HEADER.unpack_from(message)
+        if kind == KEYFRAME:
+            reference = EMPTY
+        elif self.keyframe is None:
+            return None
+        else:
+            reference = self.keyframe
+        pos = HEADER.size
+        score, pos = _get(message, pos)
+        level, pos = _get(message, pos)
+        (star_vel,) = STAR_VEL_FORMAT.unpack_from(message, pos)
+        pos += STAR_VEL_FORMAT.size
+        player_x, pos = _get(message, pos)
+        player_y, pos = _get(message, pos)
+        stars, pos = _get_points(message, pos, reference.stars)
+        aliens, pos = _get_points(message, pos, reference.aliens)
+        lasers, pos = _get_points(message, pos, reference.lasers)
+        state = State(
+            tick,
+            reference.score + score,
+            reference.level + level,
+            star_vel,
+            (reference.player[0] + player_x, reference.player[1] + player_y),
+            stars,
+            aliens,
+            lasers,
+        )
+        if kind == KEYFRAME:
+            self.keyframe = state
+        return state
+
+def split_frames(buffer):
+    """Remove every complete frame from the front of buffer (a bytearray) and return them."""
+    messages = []
+    while len(buffer) >= LENGTH.size:
+        (length,) = LENGTH.unpack_from(buffer)
+        if len(buffer) < LENGTH.size + length:
+            break
+        messages.append(bytes(buffer[LENGTH.size:LENGTH.size + length]))
+        del buffer[:LENGTH.size + length]
+    return messages
+
+def _socket_for(address):
+    """Return (socket, bind/connect address) for "unix:/path", "host:port" or "port"."""
+    if address.startswith("unix:"):
+        return socket.socket(socket.AF_UNIX, socket.SOCK_STREAM), address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return socket.socket(socket.AF_INET, socket.SOCK_STREAM), (host or "127.0.0.1", int(port))
+
+def connect(address):
+    """Open a non-blocking connection to a publisher, used by the viewer."""
+    sock, target = _socket_for(address)
+    sock.connect(target)
+    sock.setblocking(False)
+    return sock
+
+class Subscriber:
+    def __init__(self, sock):
+        self.sock = sock
+        self.pending = bytearray()
+        self.needs_keyframe = True  # Set for new spectators and ones that missed a keyframe
+
+class Publisher:
+    """Streams game state to local spectators. Never blocks: slow spectators skip ticks instead."""
+    def __init__(self, address):
+        self.server, target = _socket_for(address)
+        if self.server.family == socket.AF_UNIX and os.path.exists(target):
+            os.remove(target)  # Left over from a previous run
+        else:
+            self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(target)
+        self.server.listen()
+        self.server.setblocking(False)
+        self.subscribers = []
+        self.keyframe = None
+        self.keyframe_frame = None
+        self.reset()
+        print(f"Spectator stream listening on {address}")
+
+    def reset(self):
+        """Start measuring afresh, so report() covers one round of gameplay only."""
+        self.started = time.perf_counter()
+        self.ticks = 0
+        self.encode_time = 0.0
+        self.bytes_encoded = 0
+        self.bytes_sent = 0
+
+    def publish(self, state):
+        self._accept()
+
+        started = time.perf_counter()
+        # Deltas only make sense within one round, so a tick going backwards forces a keyframe
+        is_keyframe = self.keyframe is None or not 0 <= state.tick - self.keyframe.tick < KEYFRAME_INTERVAL
+        message = encode(state) if is_keyframe else encode(state, self.keyframe)
+        frame = LENGTH.pack(len(message)) + message
+        self.encode_time += time.perf_counter() - started
+        self.ticks += 1
+        self.bytes_encoded += len(frame)
+        if is_keyframe:
+            self.keyframe = state
+            self.keyframe_frame = frame
+
+        for subscriber in self.subscribers[:]:
+            if len(subscriber.pending) > MAX_PENDING:
+                # Too far behind: skip this tick. A skipped keyframe must be resent before more deltas.
+                subscriber.needs_keyframe = subscriber.needs_keyframe or is_keyframe
+            elif subscriber.needs_keyframe:
+                subscriber.pending += self.keyframe_frame
+                if not is_keyframe:
+                    subscriber.pending += frame
+                subscriber.needs_keyframe = False
+            else:
+                subscriber.pending += frame
+            self._flush(subscriber)
+
+    def _accept(self):
+        while True:
+            try:
+                sock, _ = self.server.accept()
+            except OSError:
+                # Nothing waiting (BlockingIOError), or the connection failed (ECONNABORTED, EMFILE, ...).
+                # Either way, try again next tick rather than disturbing the game loop.
+                return
+            sock.setblocking(False)
+            self.subscribers.append(Subscriber(sock))
+
+    def _flush(self, subscriber):
+        if not subscriber.pending:
+            return
+        try:
+            sent = subscriber.sock.send(subscriber.pending)
+        except BlockingIOError:
+            return
+        except OSError:
+            subscriber.sock.close()
+            self.subscribers.remove(subscriber)
+            return
+        del subscriber.pending[:sent]
+        self.bytes_sent += sent
+
+    def report(self):
+        wall = time.perf_counter() - self.started
+        if not self.ticks:
+            return
+        print(f"[spectator] {self.bytes_encoded / wall:.0f} B/s encoded, {self.bytes_sent / wall:.0f} B/s sent "
+              f"to {len(self.subscribers)} spectator(s), {self.bytes_encoded / self.ticks:.1f} B/tick, "
+              f"encode {1e6 * self.encode_time / self.ticks:.1f} us/tick")
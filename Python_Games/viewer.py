@@ -0,0 +1,131 @@
+# Spectator dashboard for Space Dodge.
+# Usage: python viewer.py ADDRESS [ADDRESS ...]
+# Each address is a game started with SPACE_DODGE_SPECTATE set to the same value. Every stream
+# gets a tile in a grid, drawn with plain shapes so the viewer loads no game assets.
+import math
+import sys
+import time
+import pygame
+import spectator
+
+WIDTH, HEIGHT = 1280, 720
+GAME_WIDTH, GAME_HEIGHT = 1920, 800  # Size of the game window the positions refer to
+PLAYER_WIDTH, PLAYER_HEIGHT = 40, 60
+STAR_WIDTH, STAR_HEIGHT = 50, 30
+LASER_WIDTH, LASER_HEIGHT = 30, 75
+RECONNECT_INTERVAL = 1.0  # Seconds between attempts to reach a game that isn't streaming
+
+class Stream:
+    """One connection to a running game and the latest state received from it."""
+    def __init__(self, address):
+        self.address = address
+        self.sock = None
+        self.buffer = bytearray()
+        self.decoder = spectator.Decoder()
+        self.state = None
+        self.bytes_received = 0
+        self.started = time.perf_counter()
+        self.last_attempt = 0.0
+        if not self.connect():
+            print(f"Could not connect to {self.address}, retrying every {RECONNECT_INTERVAL:g}s")
+
+    def connect(self):
+        """Try to (re)connect. A new connection starts from a fresh keyframe."""
+        self.last_attempt = time.perf_counter()
+        try:
+            self.sock = spectator.connect(self.address)
+        except OSError:
+            self.sock = None
+            return False
+        self.buffer.clear()
+        self.decoder = spectator.Decoder()
+        return True
+
+    def poll(self):
+        if self.sock is None:
+            # Games restart all the time during a tournament, so keep trying
+            if time.perf_counter() - self.last_attempt < RECONNECT_INTERVAL or not self.connect():
+                return
+        while True:
+            try:
+                chunk = self.sock.recv(65536)
+            except BlockingIOError:
+                break
+            except OSError:
+                chunk = b""
+            if not chunk:
+                self.sock.close()
+                self.sock = None
+                break
+            self.buffer += chunk
+            self.bytes_received += len(chunk)
+        for message in spectator.split_frames(self.buffer):
+            state = self.decoder.decode(message)
+            if state is not None:
+                self.state = state
+
+    def rate(self):
+        return self.bytes_received / max(time.perf_counter() - self.started, 1e-6)
+
+def draw_stream(window, font, stream, tile):
+    pygame.draw.rect(window, (10, 10, 30), tile)
+    scale_x = tile.width / GAME_WIDTH
+    scale_y = tile.height / GAME_HEIGHT
+
+    def scaled(x, y, width, height):
+        return pygame.Rect(tile.x + x * scale_x, tile.y + y * scale_y,
+                           max(1, width * scale_x), max(1, height * scale_y))
+
+    state = stream.state
+    if state is not None:
+        window.set_clip(tile)
+        for x, y in state.stars:
+            pygame.draw.rect(window, (150, 150, 150), scaled(x, y, STAR_WIDTH, STAR_HEIGHT))
+        for x, y in state.aliens:
+            pygame.draw.rect(window, (220, 40, 40), scaled(x, y, STAR_WIDTH, STAR_HEIGHT))
+        for x, y in state.lasers:
+            pygame.draw.rect(window, (255, 220, 0), scaled(x, y, LASER_WIDTH, LASER_HEIGHT))
+        pygame.draw.rect(window, (70, 200, 90), scaled(*state.player, PLAYER_WIDTH, PLAYER_HEIGHT))
+        window.set_clip(None)
+        label = f"{stream.address}  Score: {state.score}  Level: {state.level}  Speed: {state.star_vel:g}"
+    else:
+        label = f"{stream.address}  waiting..."
+    if stream.sock is None:
+        label += "  (disconnected)"
+    label += f"  {stream.rate() / 1024:.1f} KiB/s"
+    window.blit(font.render(label, True, "White"), (tile.x + 5, tile.y + 5))
+    pygame.draw.rect(window, (60, 60, 60), tile, 1)
+
+def main(addresses):
+    pygame.init()
+    window = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Space Dodge Spectator")
+    font = pygame.font.SysFont("comicsans", 14)
+    clock = pygame.time.Clock()
+
+    streams = [Stream(address) for address in addresses]
+    columns = math.ceil(math.sqrt(len(streams)))
+    rows = math.ceil(len(streams) / columns)
+    tile_width, tile_height = WIDTH // columns, HEIGHT // rows
+
+    run = True
+    while run:
+        clock.tick(60)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                run = False
+
+        window.fill((0, 0, 0))
+        for i, stream in enumerate(streams):
+            stream.poll()
+            tile = pygame.Rect((i % columns) * tile_width, (i // columns) * tile_height, tile_width, tile_height)
+            draw_stream(window, font, stream, tile)
+        pygame.display.update()
+
+    pygame.quit()
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python viewer.py ADDRESS [ADDRESS ...]")
+        sys.exit(1)
+    main(sys.argv[1:])